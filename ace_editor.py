@@ -1,12 +1,14 @@
 import streamlit as st
 from streamlit_ace import st_ace
 from bedrock import auto_edit_template
+from context_builder import DEFAULT_CONTEXT_BUDGET
 
-def ace_editor(content):
+def ace_editor(content, other_files=None):
     """
     Displays the Ace editor with manual editing and an AI-edit option.
     Both the Ace editor and the output below are updated when new AI-edited
-    code is returned.
+    code is returned. other_files (the rest of the template) are used as
+    context for AI edits.
     """
     # Initialize session state variables if not already set.
     if "editor_content" not in st.session_state:
@@ -14,32 +16,54 @@ def ace_editor(content):
     if "ace_version" not in st.session_state:
         st.session_state["ace_version"] = 0  # Used to force reinitialization of the Ace widget
 
+    editor_panel(other_files)
+    return st.session_state["editor_content"]
+
+
+@st.fragment
+def editor_panel(other_files=None):
+    """
+    The editor controls, Ace widget and AI edit form. Runs as a fragment so
+    changing a setting or submitting an AI edit only reruns this panel, not
+    the whole app.
+    """
     # ------------------------------
-    # Sidebar - Editor Configuration
+    # Editor Configuration
     # ------------------------------
-    st.sidebar.title("Editor Controls")
-    theme = st.sidebar.selectbox(
-        "Choose Theme",
-        options=["monokai", "github", "tomorrow", "kuroir", "twilight", "xcode", "textmate", "terminal"],
-        index=0,
-    )
-    language = st.sidebar.selectbox(
-        "Select Language",
-        options=["python", "javascript", "html", "css", "java", "c++", "ruby"],
-        index=0,
-    )
-    height = st.sidebar.slider("Editor Height (px)", min_value=300, max_value=1000, value=600)
-    font_size = st.sidebar.slider("Font Size", min_value=8, max_value=24, value=14)
-    tab_size = st.sidebar.slider("Tab Size", min_value=2, max_value=8, value=4)
-    wrap_enabled = st.sidebar.checkbox("Enable Wrap", value=True)
-    show_gutter = st.sidebar.checkbox("Show Gutter", value=True)
-    show_print_margin = st.sidebar.checkbox("Show Print Margin", value=False)
-    keybinding = st.sidebar.selectbox(
-        "Keybinding Mode",
-        options=["ace", "vscode", "sublime", "emacs"],
-        index=1,
-    )
-    auto_update = st.sidebar.checkbox("Auto-update Editor", value=True)
+    # Kept inside the fragment (fragments can't write to the sidebar) so
+    # adjusting a control only reruns the editor.
+    with st.expander("⚙️ Editor Controls"):
+        col1, col2, col3 = st.columns(3)
+        theme = col1.selectbox(
+            "Choose Theme",
+            options=["monokai", "github", "tomorrow", "kuroir", "twilight", "xcode", "textmate", "terminal"],
+            index=0,
+        )
+        language = col2.selectbox(
+            "Select Language",
+            options=["python", "javascript", "html", "css", "java", "c++", "ruby"],
+            index=0,
+        )
+        keybinding = col3.selectbox(
+            "Keybinding Mode",
+            options=["ace", "vscode", "sublime", "emacs"],
+            index=1,
+        )
+        height = col1.slider("Editor Height (px)", min_value=300, max_value=1000, value=600)
+        font_size = col2.slider("Font Size", min_value=8, max_value=24, value=14)
+        tab_size = col3.slider("Tab Size", min_value=2, max_value=8, value=4)
+        wrap_enabled = col1.checkbox("Enable Wrap", value=True)
+        show_gutter = col2.checkbox("Show Gutter", value=True)
+        show_print_margin = col3.checkbox("Show Print Margin", value=False)
+        auto_update = col1.checkbox("Auto-update Editor", value=True)
+        context_budget = col2.slider(
+            "AI Context Budget (tokens)",
+            min_value=0,
+            max_value=8000,
+            value=DEFAULT_CONTEXT_BUDGET,
+            step=250,
+            help="How much of the template's other files to send along with AI edits.",
+        )
 
     # ------------------------------
     # Main Content - The Ace Editor
@@ -72,14 +96,19 @@ def ace_editor(content):
 
     if st.button("Submit AI Edit"):
         # Pass both the current prompt and the current editor content to your AI editor function.
-        new_code = auto_edit_template(prompt=prompt_edit, code=editor_content)
+        new_code = auto_edit_template(
+            prompt=prompt_edit,
+            code=editor_content,
+            other_files=other_files,
+            context_budget=context_budget,
+        )
         if new_code:
             # Update session state with the AI-edited code.
             st.session_state["editor_content"] = new_code
             # Increment the version to force the Ace editor widget to reinitialize.
             st.session_state["ace_version"] += 1
             st.success("Editor updated with AI edits!")
-            st.rerun()
+            st.rerun(scope="fragment")
         else:
             st.error("AI did not return any new code. Please try again.")
 
@@ -89,8 +118,6 @@ def ace_editor(content):
     st.subheader("Editor Output:")
     st.code(editor_content, language=language)
 
-    return editor_content
-
 
 if __name__ == "__main__":
     sample_content = """
@@ -1,8 +1,8 @@
 import streamlit as st
 from template_factory import display_templates_component, open_generated_template_modal
 from bedrock import generate_template
-import io
-import zipfile
+from syntax_highlight import highlight_css, render_code
+from template_core import create_template_zip
 import os
 import base64
 
@@ -16,6 +16,7 @@ st.set_page_config(
 
 # Load custom CSS
 def load_css():
+    st.markdown(f'<style>{highlight_css()}</style>', unsafe_allow_html=True)
     with open(".streamlit/style.css") as f:
         st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
@@ -31,25 +32,6 @@ if "selected_template" not in st.session_state:
 if "generated_template" not in st.session_state:
     st.session_state["generated_template"] = None
 
-# -------------------------------------------------------------------
-def create_template_zip(template):
-    """
-    Given a template dict with keys 'main_file', 'main_file_content', and optionally 'other_files',
-    create an in-memory ZIP file containing all of the template files.
-    """
-    buffer = io.BytesIO()
-    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        # Write the main file.
-        main_file_name = template.get("main_file", "template.txt")
-        main_content = template.get("main_file_content", "")
-        zip_file.writestr(main_file_name, main_content)
-        
-        # Write any other files.
-        for file_name, content in template.get("other_files", {}).items():
-            zip_file.writestr(file_name, content)
-    buffer.seek(0)  # Rewind the buffer to the beginning so it can be read.
-    return buffer
-
 # -------------------------------------------------------------------
 # Function to add rounded borders to images
 def add_image_styling(image_path, caption=None, width=None):
@@ -66,10 +48,76 @@ def add_image_styling(image_path, caption=None, width=None):
     
     return img_html
 
+@st.cache_data(show_spinner=False)
 def get_base64_of_image(image_path):
     with open(image_path, "rb") as img_file:
         return base64.b64encode(img_file.read()).decode()
 
+@st.cache_data(show_spinner=False, max_entries=50)
+def get_template_zip_bytes(template):
+    """
+    Build the template's ZIP archive once per distinct template content.
+    """
+    return create_template_zip(template).getvalue()
+
+# -------------------------------------------------------------------
+# Fragments: each of these reruns on its own when one of its widgets is used,
+# instead of re-executing (and re-sending) the whole page.
+@st.fragment
+def template_actions(template):
+    # Create the ZIP archive from the template
+    template_zip = get_template_zip_bytes(template)
+
+    # Add some space
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # Provide action buttons
+    st.download_button(
+        label="📥 Download Template",
+        data=template_zip,
+        file_name="template.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
+
+    st.link_button("🏗️ Create New Repository", 
+                  url="https://github.com/new",
+                  use_container_width=True)
+
+@st.fragment
+def ai_generator_section():
+    st.markdown(
+        """
+        <div class="template-card">
+            <h2 style="margin-top: 0;">🤖 AI Template Generator</h2>
+            <p>Describe the template you need, and our AI will create it for you.</p>
+        </div>
+        """, 
+        unsafe_allow_html=True
+    )
+    
+    prompt = st.text_area(
+        "Describe your ideal template:",
+        placeholder="Example: A Flask API with MongoDB integration and JWT authentication...",
+        height=150
+    )
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        if st.button("🔮 Generate Template", use_container_width=True):
+            with st.spinner("🧙‍♂️ Our AI is crafting your template..."):
+                template = generate_template(prompt)
+                # Save the generated result to session state.
+                st.session_state["generated_template"] = template
+                st.success("✅ New template generated! Preview it below.")
+    
+    # If a generated template exists, show a preview button (which opens the modal).
+    if st.session_state.get("generated_template"):
+        with col2:
+            if st.button("👁️ Preview Template", use_container_width=True):
+                open_generated_template_modal()
+
 # -------------------------------------------------------------------
 # Check if we are in "edit mode". If so, show the Ace editor.
 if st.session_state.get("edit_mode"):
@@ -79,8 +127,9 @@ if st.session_state.get("edit_mode"):
     
     # Retrieve the current template code from the session.
     template_code = st.session_state.get("selected_template", {}).get("main_file_content", "")
+    template_other_files = st.session_state.get("selected_template", {}).get("other_files", {})
     # Run the Ace editor and capture the (possibly edited) content.
-    edited_code = ace_editor(template_code)
+    edited_code = ace_editor(template_code, other_files=template_other_files)
     
     # Create two columns for the Save and Back buttons.
     col1, col2 = st.columns(2)
@@ -134,7 +183,7 @@ if st.session_state["selected_template"] is not None:
             
             # Display the main file in a nicely styled code block
             st.markdown(f"### 📄 Main File: `{selected_template['main_file']}`")
-            st.code(selected_template["main_file_content"], language="python")
+            render_code(selected_template["main_file_content"], file_name=selected_template["main_file"])
             
             # Display other files in a clean accordion
             other_files = selected_template.get("other_files", {})
@@ -142,7 +191,7 @@ if st.session_state["selected_template"] is not None:
                 st.markdown("### 📁 Additional Files")
                 for file_name, content in other_files.items():
                     with st.expander(f"📝 {file_name}"):
-                        st.code(content, language="python")
+                        render_code(content, file_name=file_name)
         
         with col2:
             # Create a styled sidebar card
@@ -164,24 +213,9 @@ if st.session_state["selected_template"] is not None:
                     badges_html += f'<span style="background-color: #FF4B4B; color: white; padding: 4px 8px; border-radius: 4px; margin-right: 5px; font-weight: 500;">{item}</span>'
                 st.markdown(badges_html, unsafe_allow_html=True)
             
-            # Create the ZIP archive from the template
-            template_zip = create_template_zip(selected_template)
-            
-            # Add some space
-            st.markdown("<br>", unsafe_allow_html=True)
-            
-            # Provide action buttons
-            st.download_button(
-                label="📥 Download Template",
-                data=template_zip,
-                file_name="template.zip",
-                mime="application/zip",
-                use_container_width=True
-            )
-            
-            st.link_button("🏗️ Create New Repository", 
-                          url="https://github.com/new",
-                          use_container_width=True)
+            # Download / new repository buttons (a fragment, so downloading
+            # doesn't rerun the whole details page)
+            template_actions(selected_template)
             
             st.markdown("</div>", unsafe_allow_html=True)
         
@@ -300,34 +334,4 @@ if selected_option == "Browse Existing Templates":
     display_templates_component()
 
 elif selected_option == "Generate Custom Template":
-    st.markdown(
-        """
-        <div class="template-card">
-            <h2 style="margin-top: 0;">🤖 AI Template Generator</h2>
-            <p>Describe the template you need, and our AI will create it for you.</p>
-        </div>
-        """, 
-        unsafe_allow_html=True
-    )
-    
-    prompt = st.text_area(
-        "Describe your ideal template:",
-        placeholder="Example: A Flask API with MongoDB integration and JWT authentication...",
-        height=150
-    )
-    
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        if st.button("🔮 Generate Template", use_container_width=True):
-            with st.spinner("🧙‍♂️ Our AI is crafting your template..."):
-                template = generate_template(prompt)
-                # Save the generated result to session state.
-                st.session_state["generated_template"] = template
-                st.success("✅ New template generated! Preview it below.")
-    
-    # If a generated template exists, show a preview button (which opens the modal).
-    if st.session_state.get("generated_template"):
-        with col2:
-            if st.button("👁️ Preview Template", use_container_width=True):
-                open_generated_template_modal()
\ No newline at end of file
+    ai_generator_section()
@@ -0,0 +1,299 @@
+"""
+Headless batch runner for Template Lab.
+
+Fetches repository templates and runs LLM generations listed in a manifest
+over a thread or process pool, exporting each result to disk. Progress is
+appended to a JSONL checkpoint so an interrupted run can be resumed.
+
+Example manifest (JSON):
+
+    {
+        "jobs": [
+            {"id": "chatbot", "type": "fetch", "url": "https://github.com/owner/repo.git"},
+            {"id": "flask-api", "type": "generate", "prompt": "A Flask API with JWT auth", "main_file": "app.py"}
+        ]
+    }
+
+Usage:
+
+    python batch.py manifest.json --output exports --workers 8
+    python batch.py --catalog --output exports --zip
+    python batch.py --catalog --output exports --git-mirrors .mirrors
+
+Set GITHUB_TOKEN to authenticate GitHub API calls; anonymous requests are
+rate limited to 60 per hour.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from git_mirror import GitMirrorBackend
+from model_router import DEFAULT_FAST_MAX_INPUT_TOKENS, FAST_MODEL_ID, LARGE_MODEL_ID, ModelRouter, TelemetryLog
+from template_core import (
+    create_template_zip,
+    fetch_repo_template,
+    run_generation,
+    template_info,
+)
+
+# One model router per worker process, keyed by its configuration.
+_router_cache = {}
+
+
+def _get_worker_router(router_config):
+    key = tuple(sorted(router_config.items()))
+    if key not in _router_cache:
+        config = dict(router_config)
+        thresholds = {"edit": config.pop("edit_fast_max_tokens"), "generate": config.pop("generate_fast_max_tokens")}
+        telemetry = TelemetryLog(config.pop("telemetry_path", None))
+        _router_cache[key] = ModelRouter(fast_max_input_tokens=thresholds, telemetry=telemetry, **config)
+    return _router_cache[key]
+
+
+# One git mirror backend per worker process, keyed by its cache directory.
+_mirror_cache = {}
+
+
+def _get_worker_mirror(mirror_dir):
+    if mirror_dir not in _mirror_cache:
+        _mirror_cache[mirror_dir] = GitMirrorBackend(mirror_dir)
+    return _mirror_cache[mirror_dir]
+
+
+def slugify(name):
+    """
+    Turn a job id or template name into a safe directory/file name.
+    """
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-") or "template"
+
+
+def load_manifest(path):
+    """
+    Load the list of jobs from a JSON manifest. Jobs without an id get one
+    derived from their URL or position.
+    """
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    jobs = manifest["jobs"] if isinstance(manifest, dict) else manifest
+    for index, job in enumerate(jobs):
+        if "id" not in job:
+            if job.get("url"):
+                job["id"] = slugify(job["url"].rstrip("/").split("/")[-1].removesuffix(".git"))
+            else:
+                job["id"] = f"job-{index}"
+    return jobs
+
+
+def catalog_jobs():
+    """
+    Build fetch jobs for every repository in the built-in catalog.
+    """
+    return [
+        {"id": slugify(name), "type": "fetch", "url": info["url"]}
+        for name, info in template_info.items()
+    ]
+
+
+def load_checkpoint(path):
+    """
+    Return the ids of jobs that already completed successfully.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A partially written last line from an interrupted run.
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def run_job(job, router_config, mirror_dir=None):
+    """
+    Execute a single job and return the resulting template dict.
+    Runs inside a worker thread or process, so it must not touch any UI.
+    Fetches go through local git mirrors in mirror_dir when it's given.
+    """
+    job_type = job.get("type", "fetch")
+    if job_type == "fetch":
+        if mirror_dir:
+            return _get_worker_mirror(mirror_dir).fetch_template(job["url"], refresh=True)
+        # Strict: a repository with any file that failed to fetch is an error,
+        # so it isn't checkpointed as done and gets retried on resume.
+        return fetch_repo_template(job["url"], strict=True)
+    if job_type == "generate":
+        content = run_generation(_get_worker_router(router_config), job["prompt"])
+        return {
+            "main_file": job.get("main_file", "generated_template.txt"),
+            "main_file_content": content,
+            "other_files": {},
+        }
+    raise ValueError(f"Unknown job type: {job_type}")
+
+
+def run_timed_job(job, router_config, mirror_dir=None):
+    """
+    Run a job and time it inside the worker, so the measured latency doesn't
+    include time spent waiting in the pool queue.
+    Returns (template, error message, elapsed seconds).
+    """
+    started = time.perf_counter()
+    try:
+        template = run_job(job, router_config, mirror_dir)
+        return template, None, time.perf_counter() - started
+    except Exception as e:
+        return None, str(e), time.perf_counter() - started
+
+
+def export_template(template, output_dir, job_id, as_zip=False):
+    """
+    Write a template to output_dir, either as '<job_id>.zip' or as a
+    '<job_id>/' directory tree. Returns the path written.
+    """
+    name = slugify(job_id)
+    if as_zip:
+        path = os.path.join(output_dir, f"{name}.zip")
+        with open(path, "wb") as f:
+            f.write(create_template_zip(template).getvalue())
+        return path
+
+    root = os.path.abspath(os.path.join(output_dir, name))
+    files = {template.get("main_file", "template.txt"): template.get("main_file_content", "")}
+    files.update(template.get("other_files", {}))
+    for file_name, content in files.items():
+        file_path = os.path.abspath(os.path.join(root, file_name))
+        # Never write outside the template's own directory.
+        if not file_path.startswith(root + os.sep):
+            continue
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content or "")
+    return root
+
+
+def run_batch(jobs, output_dir, workers=4, use_processes=False, as_zip=False,
+              checkpoint_path=None, resume=True, router_config=None, mirror_dir=None, progress=None):
+    """
+    Run jobs over a worker pool, exporting results and appending one
+    checkpoint record per finished job. Jobs already recorded as successful
+    in the checkpoint are skipped when resume is true.
+    Returns a (succeeded, failed, skipped) tuple of counts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(output_dir, "checkpoint.jsonl")
+    done = load_checkpoint(checkpoint_path) if resume else set()
+    pending = [job for job in jobs if job["id"] not in done]
+    skipped = len(jobs) - len(pending)
+    if progress:
+        progress(f"{len(pending)} jobs to run, {skipped} already done, {workers} workers")
+
+    router_config = router_config or {}
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    succeeded = failed = 0
+    started = time.perf_counter()
+
+    with executor_cls(max_workers=workers) as executor, open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        futures = {executor.submit(run_timed_job, job, router_config, mirror_dir): job for job in pending}
+        for count, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            record = {"id": job["id"], "type": job.get("type", "fetch")}
+            try:
+                template, error, elapsed = future.result()
+            except Exception as e:  # The worker itself died, e.g. a broken process pool.
+                template, error, elapsed = None, str(e), None
+            if error is None:
+                try:
+                    record["output"] = export_template(template, output_dir, job["id"], as_zip=as_zip)
+                except Exception as e:
+                    error = str(e)
+            if error is None:
+                record["status"] = "ok"
+                succeeded += 1
+            else:
+                record["status"] = "error"
+                record["error"] = error
+                failed += 1
+            record["elapsed"] = round(elapsed, 3) if elapsed is not None else None
+
+            checkpoint.write(json.dumps(record) + "\n")
+            checkpoint.flush()
+            if progress:
+                detail = record.get("error", record.get("output"))
+                progress(f"[{count}/{len(pending)}] {job['id']}: {record['status']} ({record['elapsed']}s) {detail}")
+
+    elapsed = time.perf_counter() - started
+    if progress and pending:
+        progress(f"Finished {len(pending)} jobs in {elapsed:.1f}s ({len(pending) / elapsed:.2f} jobs/s): "
+                 f"{succeeded} ok, {failed} failed, {skipped} skipped")
+    return succeeded, failed, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk fetch and generate templates without Streamlit.")
+    parser.add_argument("manifest", nargs="?", help="JSON manifest listing the jobs to run.")
+    parser.add_argument("--catalog", action="store_true", help="Also fetch every repository in the built-in catalog.")
+    parser.add_argument("--output", default="exports", help="Directory to export templates to.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers.")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of threads.")
+    parser.add_argument("--zip", action="store_true", help="Export each template as a ZIP file.")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>/checkpoint.jsonl).")
+    parser.add_argument("--no-resume", action="store_true", help="Re-run jobs already in the checkpoint.")
+    parser.add_argument("--git-mirrors", help="Fetch repositories through local bare git mirrors kept in this directory.")
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION"),
+                        help="AWS region for Bedrock generations.")
+    parser.add_argument("--fast-model-id", default=FAST_MODEL_ID, help="Bedrock model id for the fast tier.")
+    parser.add_argument("--large-model-id", default=LARGE_MODEL_ID, help="Bedrock model id for the large tier.")
+    parser.add_argument("--generate-fast-max-tokens", type=int, default=0,
+                        help="Largest generation prompt (estimated tokens) sent to the fast tier.")
+    parser.add_argument("--telemetry", help="Append per-call LLM telemetry to this JSONL file "
+                                            "(default: <output>/telemetry.jsonl).")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest) if args.manifest else []
+    if args.catalog:
+        jobs.extend(catalog_jobs())
+    if not jobs:
+        parser.error("no jobs: pass a manifest and/or --catalog")
+
+    ids = [job["id"] for job in jobs]
+    duplicates = sorted({job_id for job_id in ids if ids.count(job_id) > 1})
+    if duplicates:
+        parser.error(f"duplicate job ids: {', '.join(duplicates)}")
+
+    # Credentials come from the environment / boto3's default chain.
+    router_config = {
+        "region_name": args.region,
+        "fast_model_id": args.fast_model_id,
+        "large_model_id": args.large_model_id,
+        "edit_fast_max_tokens": DEFAULT_FAST_MAX_INPUT_TOKENS["edit"],
+        "generate_fast_max_tokens": args.generate_fast_max_tokens,
+        "telemetry_path": os.path.abspath(args.telemetry or os.path.join(args.output, "telemetry.jsonl")),
+    }
+    _, failed, _ = run_batch(
+        jobs,
+        args.output,
+        workers=args.workers,
+        use_processes=args.processes,
+        as_zip=args.zip,
+        checkpoint_path=args.checkpoint,
+        resume=not args.no_resume,
+        router_config=router_config,
+        mirror_dir=os.path.abspath(args.git_mirrors) if args.git_mirrors else None,
+        progress=lambda message: print(message, file=sys.stderr, flush=True),
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,50 @@
-from langchain_aws import ChatBedrock
 import logging
 import streamlit as st
+from context_builder import DEFAULT_CONTEXT_BUDGET, build_edit_context, estimate_tokens
+from model_router import ModelRouter, TelemetryLog
+from template_core import run_edit, run_generation
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Retrieve AWS credentials from Streamlit secrets
-aws_access_key_id = st.secrets["aws"]["access_key_id"]
-aws_secret_access_key = st.secrets["aws"]["secret_access_key"]
-aws_region_name = st.secrets["aws"]["region_name"]
 
-# Initialize the ChatBedrock LLM with credentials
-llm = ChatBedrock(
-    model_id="anthropic.claude-3-sonnet-20240229-v1:0",
-    model_kwargs=dict(temperature=0),
-    aws_access_key_id=aws_access_key_id,
-    aws_secret_access_key=aws_secret_access_key,
-    region_name=aws_region_name,
-    # Add other necessary parameters if needed
-)
+@st.cache_resource
+def get_router():
+    """
+    Build the model router from Streamlit secrets on first use.
+    Secrets are read lazily so importing this module doesn't require them.
+
+    An optional [models] section tunes the tiers, e.g.:
+        fast_model_id, large_model_id, edit_fast_max_tokens,
+        generate_fast_max_tokens, telemetry_path
+    """
+    models = st.secrets.get("models", {})
+    thresholds = {}
+    if "edit_fast_max_tokens" in models:
+        thresholds["edit"] = int(models["edit_fast_max_tokens"])
+    if "generate_fast_max_tokens" in models:
+        thresholds["generate"] = int(models["generate_fast_max_tokens"])
+
+    router_options = {}
+    if "fast_model_id" in models:
+        router_options["fast_model_id"] = models["fast_model_id"]
+    if "large_model_id" in models:
+        router_options["large_model_id"] = models["large_model_id"]
+
+    return ModelRouter(
+        fast_max_input_tokens=thresholds,
+        telemetry=TelemetryLog(models.get("telemetry_path")),
+        aws_access_key_id=st.secrets["aws"]["access_key_id"],
+        aws_secret_access_key=st.secrets["aws"]["secret_access_key"],
+        region_name=st.secrets["aws"]["region_name"],
+        **router_options,
+    )
+
 
 def generate_template(prompt):
-    messages = [
-        ("system", "You are a code template generator. Your output should be only valid code. Do not include any other text or comments."),
-        ("human", prompt),
-    ]
     try:
-        # Invoke the ChatBedrock LLM
-        ai_msg = llm.invoke(messages)
-        # Log raw AI response for debugging
-        logger.info(f"Raw AI response: {ai_msg}")
-
-        # Extract the text content from the returned object.
-        # Adjust the method to match the actual structure of ai_msg.
-        content = ai_msg.content
+        content = run_generation(get_router(), prompt)
         logger.info("Template generated successfully.")
         return content
 
@@ -45,31 +55,20 @@ def generate_template(prompt):
 
 
 
-def auto_edit_template(prompt, code):
-    messages = [
-        ("system", """
-         You are a code template editor.
-         Your goal is to edit the CODE provided based on the user PROMPT Your output should be only valid code. 
-         Do not include any other text or comments."""),
-        ("human", f"PROMPT: {prompt}\nCODE: {code}"),
-    ]
+def auto_edit_template(prompt, code, other_files=None, context_budget=DEFAULT_CONTEXT_BUDGET):
+    """
+    Edit code based on prompt. When other_files are given, the chunks most
+    relevant to the prompt are packed into the request (up to context_budget
+    tokens) so the model can see related parts of the template.
+    """
+    context = build_edit_context(prompt, code, other_files, token_budget=context_budget)
+    if context:
+        logger.info(f"Packed ~{estimate_tokens(context)} tokens of template context for AI edit.")
     try:
-        # Invoke the ChatBedrock LLM
-        ai_msg = llm.invoke(messages)
-        # Log raw AI response for debugging
-        logger.info(f"Raw AI response: {ai_msg}")
-
-        # Extract the text content from the returned object.
-        # Adjust the method to match the actual structure of ai_msg.
-        content = ai_msg.content
+        content = run_edit(get_router(), prompt, code, context)
         logger.info("Template edited successfully.")
         return content
 
     except Exception as e:
         logger.error(f"Error generating templates: {e}")
         return None
-    
-
-
-
-
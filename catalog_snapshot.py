@@ -0,0 +1,318 @@
+"""
+Prebuilt catalog snapshot.
+
+A build step packs every catalog repository's files, a ready-to-serve
+thumbnail and its metadata into a single indexed binary file:
+
+    python catalog_snapshot.py build --output catalog.snapshot
+
+Set GITHUB_TOKEN to authenticate the GitHub API calls made by the build.
+
+At startup the app memory-maps the snapshot and serves previews straight
+from it, so a fresh server doesn't need GitHub for catalog templates. Only
+the small index is parsed; file contents stay in the page cache and are
+decoded on demand.
+
+File layout (little-endian):
+
+    header   magic (8 bytes) | index offset (u64) | index length (u64)
+    blobs    file contents and thumbnails, each stored once
+    index    UTF-8 JSON: {"version", "built_at", "templates": {name: {...}}}
+
+Each template entry holds its metadata plus [offset, length] pairs for its
+files and thumbnail.
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"TLSNAP1\0"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sQQ")
+
+# Snapshot loaded by the app, unless TEMPLATE_LAB_SNAPSHOT points elsewhere.
+DEFAULT_SNAPSHOT_PATH = "catalog.snapshot"
+
+# Thumbnail size used by the catalog grid.
+THUMBNAIL_SIZE = (300, 200)
+
+# Extra attempts per repository when a build fetch fails.
+BUILD_RETRIES = 2
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or not a snapshot."""
+
+
+def snapshot_path():
+    """
+    Return the snapshot path the app should load.
+    """
+    return os.environ.get("TEMPLATE_LAB_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file. Safe to share between
+    threads; contents are only read (and decoded) when asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # Empty file.
+            self._file.close()
+            raise SnapshotError(f"{path} is empty") from e
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{path} is truncated")
+        magic, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or index_offset + index_length > len(self._map):
+            self.close()
+            raise SnapshotError(f"{path} is not a valid catalog snapshot")
+
+        try:
+            index = json.loads(self._map[index_offset:index_offset + index_length])
+            self.built_at = index.get("built_at")
+            self.templates = index["templates"]
+            self._by_url = {entry["url"]: name for name, entry in self.templates.items()}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.close()
+            raise SnapshotError(f"{path} has a corrupt index: {e}") from e
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _read(self, location):
+        offset, length = location
+        return self._map[offset:offset + length]
+
+    def __contains__(self, name):
+        return name in self.templates
+
+    def name_for_url(self, url):
+        """
+        Return the catalog name for a repository URL, or None.
+        """
+        return self._by_url.get(url)
+
+    def get_template(self, name):
+        """
+        Return the template dict (main_file, main_file_content, other_files,
+        branch) for a catalog name, or None if it isn't in the snapshot.
+        """
+        entry = self.templates.get(name)
+        if entry is None:
+            return None
+        files = entry["files"]
+        main_file = entry["main_file"]
+        return {
+            "main_file": main_file,
+            "main_file_content": self._read(files[main_file]).decode("utf-8"),
+            "other_files": {
+                path: self._read(location).decode("utf-8")
+                for path, location in files.items()
+                if path != main_file
+            },
+            "branch": entry.get("branch"),
+        }
+
+    def get_thumbnail(self, name):
+        """
+        Return the pre-resized thumbnail bytes for a catalog name, or None.
+        """
+        entry = self.templates.get(name)
+        if entry is None or not entry.get("thumbnail"):
+            return None
+        return self._read(entry["thumbnail"])
+
+
+def load_snapshot(path=None):
+    """
+    Open the snapshot at path (default: snapshot_path()). Returns None if
+    there is no snapshot or it can't be read, so callers can fall back to
+    fetching from GitHub.
+    """
+    path = path or snapshot_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return CatalogSnapshot(path)
+    except (OSError, SnapshotError) as e:
+        logger.warning(f"Ignoring catalog snapshot, falling back to GitHub: {e}")
+        return None
+
+
+# -----------------------------------------------------------------------------
+# Building
+# -----------------------------------------------------------------------------
+def make_thumbnail(image_path, size=THUMBNAIL_SIZE):
+    """
+    Resize an image to the catalog thumbnail size and return PNG bytes.
+    """
+    from PIL import Image
+
+    img = Image.open(image_path)
+    img = img.resize(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _BlobWriter:
+    """
+    Appends blobs to the snapshot file, storing identical content only once.
+    """
+
+    def __init__(self, f):
+        self._file = f
+        self._seen = {}
+
+    def add(self, data):
+        digest = hashlib.sha256(data).digest()
+        if digest not in self._seen:
+            self._seen[digest] = [self._file.tell(), len(data)]
+            self._file.write(data)
+        return self._seen[digest]
+
+
+def build_snapshot(output_path, catalog=None, workers=4, image_root=".", retries=BUILD_RETRIES, progress=None):
+    """
+    Fetch every catalog repository and write them, with their thumbnails and
+    metadata, to output_path. The file is written next to the target and
+    renamed into place so a running app never sees a partial snapshot.
+
+    Every file must fetch cleanly: a repository is retried up to retries
+    times, after which its TemplateFetchError aborts the build and the
+    existing snapshot is left in place.
+    Returns the number of templates packed.
+    """
+    from template_core import TemplateFetchError, fetch_repo_template, template_info
+
+    catalog = catalog if catalog is not None else template_info
+
+    def fetch(item):
+        name, info = item
+        for attempt in range(retries + 1):
+            try:
+                template = fetch_repo_template(info["url"], strict=True)
+                break
+            except TemplateFetchError as e:
+                if attempt == retries:
+                    raise
+                if progress:
+                    progress(f"Retrying {name} ({e})")
+                time.sleep(2 ** attempt)
+        if progress:
+            progress(f"Fetched {name} ({len(template['other_files']) + 1} files)")
+        return name, info, template
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetched = list(executor.map(fetch, catalog.items()))
+
+    tmp_path = f"{output_path}.tmp"
+    templates = {}
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, 0, 0))
+        blobs = _BlobWriter(f)
+        for name, info, template in fetched:
+            files = {template["main_file"]: blobs.add(template["main_file_content"].encode("utf-8"))}
+            for path, content in template["other_files"].items():
+                files[path] = blobs.add(content.encode("utf-8"))
+
+            thumbnail = None
+            image_path = os.path.join(image_root, info["image"]) if info.get("image") else None
+            if image_path and os.path.exists(image_path):
+                thumbnail = blobs.add(make_thumbnail(image_path))
+
+            templates[name] = {
+                "url": info["url"],
+                "image": info.get("image"),
+                "details": info.get("details", ""),
+                "stack": info.get("stack", ""),
+                "branch": template.get("branch"),
+                "main_file": template["main_file"],
+                "files": files,
+                "thumbnail": thumbnail,
+            }
+
+        index = json.dumps({
+            "version": SNAPSHOT_VERSION,
+            "built_at": time.time(),
+            "templates": templates,
+        }).encode("utf-8")
+        index_offset = f.tell()
+        f.write(index)
+        f.seek(0)
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, index_offset, len(index)))
+
+    os.replace(tmp_path, output_path)
+    return len(templates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the packed catalog snapshot.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Fetch the catalog and write a snapshot.")
+    build_parser.add_argument("--output", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot file to write.")
+    build_parser.add_argument("--workers", type=int, default=4, help="Repositories to fetch in parallel.")
+    build_parser.add_argument("--retries", type=int, default=BUILD_RETRIES,
+                              help="Extra attempts per repository before the build fails.")
+
+    info_parser = subparsers.add_parser("info", help="List the templates in a snapshot.")
+    info_parser.add_argument("path", nargs="?", default=DEFAULT_SNAPSHOT_PATH)
+
+    args = parser.parse_args(argv)
+    # Catalog image paths are relative to the app directory.
+    image_root = os.path.dirname(os.path.abspath(__file__))
+
+    if args.command == "build":
+        from template_core import TemplateFetchError
+
+        started = time.perf_counter()
+        try:
+            count = build_snapshot(
+                args.output,
+                workers=args.workers,
+                image_root=image_root,
+                retries=args.retries,
+                progress=lambda message: print(message, file=sys.stderr, flush=True),
+            )
+        except TemplateFetchError as e:
+            print(f"Snapshot build failed, {args.output} left unchanged: {e}", file=sys.stderr)
+            return 1
+        size = os.path.getsize(args.output)
+        print(f"Packed {count} templates into {args.output} ({size / 1024:.1f} KiB) "
+              f"in {time.perf_counter() - started:.1f}s")
+        return 0
+
+    snapshot = CatalogSnapshot(args.path)
+    try:
+        for name, entry in snapshot.templates.items():
+            size = sum(length for _, length in entry["files"].values())
+            print(f"{name}: {len(entry['files'])} files, {size / 1024:.1f} KiB, main file {entry['main_file']}")
+    finally:
+        snapshot.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
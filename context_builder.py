@@ -0,0 +1,173 @@
+import math
+import os
+import re
+from collections import Counter
+
+# Default token budget for the extra context sent along with an AI edit.
+DEFAULT_CONTEXT_BUDGET = 2000
+
+# Maximum number of lines in a single chunk of a context file.
+MAX_CHUNK_LINES = 40
+
+# BM25 tuning parameters.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Common words that carry no signal when matching a prompt against code.
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from",
+    "i", "if", "in", "into", "is", "it", "make", "me", "my", "of", "on", "or",
+    "please", "so", "that", "the", "this", "to", "use", "we", "with", "you",
+    "self", "none", "true", "false", "return", "def", "class", "import",
+}
+
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+PY_BOUNDARY_RE = re.compile(r"^(?:async\s+def\s|def\s|class\s|@)")
+IMPORT_RE = re.compile(r"^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+))", re.MULTILINE)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for budgeting (about four characters per token).
+    """
+    return len(text) // 4 + 1
+
+
+def tokenize(text):
+    """
+    Split text into lowercase terms. Identifiers are kept whole and also split
+    into their snake_case/camelCase parts, so "load_css" matches "css".
+    """
+    terms = []
+    for identifier in IDENTIFIER_RE.findall(text):
+        lowered = identifier.lower()
+        if lowered not in STOPWORDS and len(lowered) > 1:
+            terms.append(lowered)
+        parts = [p.lower() for piece in identifier.split("_") for p in CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(p for p in parts if p not in STOPWORDS and len(p) > 1)
+    return terms
+
+
+def chunk_file(file_path, content, max_lines=MAX_CHUNK_LINES):
+    """
+    Split a file into chunks of (start_line, end_line, text).
+    Python files are split at top-level def/class boundaries; everything is
+    then capped at max_lines per chunk.
+    """
+    lines = content.splitlines()
+    if not lines:
+        return []
+
+    # Find the starting line of each logical block.
+    starts = [0]
+    if file_path.endswith(".py"):
+        for index, line in enumerate(lines):
+            if index and PY_BOUNDARY_RE.match(line) and not lines[index - 1].startswith("@"):
+                starts.append(index)
+    starts.append(len(lines))
+
+    chunks = []
+    for block_start, block_end in zip(starts, starts[1:]):
+        for start in range(block_start, block_end, max_lines):
+            end = min(start + max_lines, block_end)
+            text = "\n".join(lines[start:end])
+            if text.strip():
+                chunks.append((start + 1, end, text))
+    return chunks
+
+
+def imported_modules(code):
+    """
+    Return the module names imported by code (e.g. {"bedrock", "utils.db"}).
+    """
+    modules = set()
+    for from_module, module in IMPORT_RE.findall(code):
+        modules.add(from_module or module)
+    return modules
+
+
+def _module_name(file_path):
+    return os.path.splitext(file_path)[0].replace("/", ".").replace("\\", ".")
+
+
+def rank_chunks(prompt, code, other_files, max_lines=MAX_CHUNK_LINES):
+    """
+    Score every chunk of other_files against the edit prompt using BM25.
+    Files imported by the code being edited, or named in the prompt, get a boost.
+    Returns a list of (score, file_path, start_line, end_line, text), best first.
+    """
+    chunks = []
+    for file_path, content in (other_files or {}).items():
+        if not isinstance(content, str):
+            continue
+        for start, end, text in chunk_file(file_path, content, max_lines):
+            chunks.append((file_path, start, end, text, Counter(tokenize(text))))
+    if not chunks:
+        return []
+
+    query = Counter(tokenize(prompt))
+    # Identifiers from the code being edited help, but less than the prompt itself.
+    for term, count in Counter(tokenize(code)).items():
+        query[term] += 0.25 * min(count, 4)
+
+    # Document frequencies and average chunk length for BM25.
+    doc_freq = Counter()
+    for *_, terms in chunks:
+        doc_freq.update(terms.keys())
+    avg_length = sum(sum(terms.values()) for *_, terms in chunks) / len(chunks) or 1
+
+    imports = imported_modules(code)
+    prompt_lower = prompt.lower()
+
+    ranked = []
+    for file_path, start, end, text, terms in chunks:
+        length = sum(terms.values())
+        score = 0.0
+        for term, weight in query.items():
+            freq = terms.get(term)
+            if not freq:
+                continue
+            idf = math.log(1 + (len(chunks) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = freq + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            score += weight * idf * freq * (BM25_K1 + 1) / norm
+
+        module = _module_name(file_path)
+        if any(name == module or name.endswith("." + module) or module.endswith("." + name) for name in imports):
+            score *= 1.5
+            score += 1.0
+        if os.path.basename(file_path).lower() in prompt_lower:
+            score += 2.0
+
+        if score > 0:
+            ranked.append((score, file_path, start, end, text))
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked
+
+
+def build_edit_context(prompt, code, other_files, token_budget=DEFAULT_CONTEXT_BUDGET):
+    """
+    Pack the most relevant chunks of the template's other files into a
+    context string that fits within token_budget. Chunks are picked by rank
+    and then laid out per file in their original order.
+    Returns an empty string if nothing relevant fits.
+    """
+    if not other_files or token_budget <= 0:
+        return ""
+
+    selected = []
+    used = 0
+    for score, file_path, start, end, text in rank_chunks(prompt, code, other_files):
+        header = f"### FILE: {file_path} (lines {start}-{end})"
+        cost = estimate_tokens(header) + estimate_tokens(text)
+        if used + cost > token_budget:
+            continue
+        selected.append((file_path, start, header, text))
+        used += cost
+
+    # Keep a file's chunks together and in reading order.
+    file_order = list(other_files.keys())
+    selected.sort(key=lambda item: (file_order.index(item[0]), item[1]))
+    return "\n\n".join(f"{header}\n{text}" for _, _, header, text in selected)
@@ -0,0 +1,171 @@
+"""
+Local bare-mirror fetch backend.
+
+Keeps one bare mirror per repository under a cache directory. The first use
+makes a shallow, blob-filtered clone (depth 1, large blobs left on the
+server until read); later refreshes run an incremental shallow `git fetch`,
+which only transfers objects the mirror doesn't already have. File contents
+are read straight from the object database into the usual template dict
+(main_file / main_file_content / other_files).
+
+Works with any URL git understands, including local paths and file:// URLs.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+
+from template_core import EmptyRepositoryError, TemplateFetchError, choose_main_file
+
+# Blobs larger than this are left on the server and fetched only if read.
+DEFAULT_BLOB_LIMIT = "512k"
+
+# How long (seconds) a mirror is considered fresh before refreshing it.
+DEFAULT_MAX_AGE = 300
+
+# Mirrors are stored here, unless TEMPLATE_LAB_GIT_MIRRORS points elsewhere.
+MIRROR_DIR_ENV = "TEMPLATE_LAB_GIT_MIRRORS"
+
+
+def _remote_url(url):
+    """
+    Return a URL git will honour --depth/--filter for. Plain local paths use
+    git's "local" transport, which ignores both, so they become file:// URLs.
+    """
+    if re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", url) or re.match(r"^[\w.-]+@[\w.-]+:", url):
+        return url
+    return "file://" + os.path.abspath(url)
+
+
+class GitMirrorBackend:
+    """
+    Fetches templates through local bare mirrors. Thread-safe: each mirror is
+    guarded by its own lock, so concurrent sessions share one clone. Separate
+    processes sharing a cache directory may race to create a mirror; the
+    first clone to be published wins and the others reuse it.
+    """
+
+    def __init__(self, cache_dir, blob_limit=DEFAULT_BLOB_LIMIT, max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.blob_limit = blob_limit
+        self.max_age = max_age
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._last_fetch = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def mirror_path(self, url):
+        """
+        Return the mirror directory for url: '<repo name>-<url hash>.git'.
+        """
+        name = url.rstrip("/").split("/")[-1]
+        name = name[:-4] if name.endswith(".git") else name
+        name = re.sub(r"[^A-Za-z0-9._-]+", "-", name) or "repo"
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.cache_dir, f"{name}-{digest}.git")
+
+    def _lock_for(self, path):
+        with self._locks_lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _clone(self, url, path):
+        import git
+
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            git.Repo.clone_from(
+                _remote_url(url),
+                tmp_path,
+                bare=True,
+                depth=1,
+                filter=f"blob:limit={self.blob_limit}",
+                single_branch=True,
+            ).close()
+            # Publish the mirror only once the clone is complete.
+            try:
+                os.replace(tmp_path, path)
+            except OSError:
+                # Another process published the same mirror first; use that one.
+                if not os.path.isdir(path):
+                    raise
+        finally:
+            # Left behind by a failed clone or a lost publishing race.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _fetch(self, repo, branch):
+        # Shallow fetch of the mirrored branch; git only sends objects the
+        # mirror is missing. The partial-clone filter is inherited from the
+        # remote configuration set up by the initial clone.
+        repo.git.fetch("--depth=1", "--no-tags", "--prune", "origin", f"+refs/heads/{branch}:refs/heads/{branch}")
+
+    def update(self, url, refresh=False):
+        """
+        Make sure the mirror for url exists and is fresh. The mirror is
+        refetched when refresh is true or it is older than max_age.
+        Returns (mirror path, branch).
+        """
+        import git
+
+        path = self.mirror_path(url)
+        with self._lock_for(path):
+            try:
+                if not os.path.exists(path):
+                    self._clone(url, path)
+                    self._last_fetch[path] = time.monotonic()
+                # Close the repo when done so its persistent `git cat-file`
+                # helper processes don't outlive the call.
+                with git.Repo(path) as repo:
+                    branch = repo.head.reference.name
+                    last_fetch = self._last_fetch.get(path)
+                    stale = last_fetch is None or time.monotonic() - last_fetch > self.max_age
+                    if refresh or stale:
+                        self._fetch(repo, branch)
+                        self._last_fetch[path] = time.monotonic()
+                return path, branch
+            except (OSError, git.GitCommandError, ValueError, TypeError) as e:
+                raise TemplateFetchError(f"Error fetching repository {url}: {e}") from e
+
+    def fetch_template(self, url, refresh=False, progress=None):
+        """
+        Return the template dict for url, read from the local mirror.
+        Same shape as template_core.fetch_repo_template.
+        """
+        import git
+
+        if progress is not None:
+            progress(f"Updating local mirror of {url}")
+        mirror_path, branch = self.update(url, refresh=refresh)
+
+        try:
+            with git.Repo(mirror_path) as repo:
+                tree = repo.commit(f"refs/heads/{branch}").tree
+                blobs = {item.path: item for item in tree.traverse() if item.type == "blob"}
+                if not blobs:
+                    raise EmptyRepositoryError("No files found in the repository.")
+
+                main_file = choose_main_file(list(blobs))
+                contents = {}
+                for path, blob in blobs.items():
+                    # Filtered-out large blobs are fetched on demand here.
+                    contents[path] = blob.data_stream.read().decode("utf-8", errors="replace")
+        except git.GitCommandError as e:
+            raise TemplateFetchError(f"Error reading repository {url}: {e}") from e
+
+        return {
+            "main_file": main_file,
+            "main_file_content": contents.pop(main_file),
+            "other_files": contents,
+            "branch": branch,
+        }
+
+
+def mirror_backend_from_env():
+    """
+    Return a GitMirrorBackend if TEMPLATE_LAB_GIT_MIRRORS is set, else None.
+    """
+    cache_dir = os.environ.get(MIRROR_DIR_ENV)
+    if not cache_dir:
+        return None
+    return GitMirrorBackend(cache_dir)
@@ -0,0 +1,536 @@
+"""
+Concurrent-session load test for the Template Lab Streamlit app.
+
+Starts the real app.py in a Streamlit server subprocess with GitHub and
+Bedrock replaced by local stand-ins (configurable latency), then drives many
+headless websocket sessions through the app flows the way a browser does:
+browse the catalog, select a template (fetch + preview dialog), confirm it
+in the dialog, open the details page and download the ZIP, enter edit mode,
+run an AI edit and go back.
+
+For every session count it reports rerun latency percentiles, throughput,
+payload bytes and server CPU per interaction, and server memory per
+connected session.
+
+Usage:
+
+    python loadtest.py --sessions 1,5,10,25 --github-latency 0.05 --bedrock-latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+
+# Ordered interactions each simulated session goes through.
+FLOW_STEPS = ["load", "browse", "select", "confirm", "download", "edit", "ai_edit", "back"]
+
+
+# -----------------------------------------------------------------------------
+# Local stand-ins for GitHub and Bedrock (installed in the server process)
+# -----------------------------------------------------------------------------
+class FakeResponse:
+    def __init__(self, status_code=200, text="", payload=None):
+        self.status_code = status_code
+        self.text = text
+        self._payload = payload
+
+    def raise_for_status(self):
+        import requests
+
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+    def json(self):
+        return self._payload
+
+
+class FakeGitHubSession:
+    """
+    Minimal stand-in for requests.Session serving a synthetic repository for
+    every owner/repo: an app.py plus extra files of file_size bytes, up to
+    file_count files in total. Every request sleeps for latency seconds.
+    """
+
+    def __init__(self, latency=0.05, file_count=8, file_size=2000):
+        self.latency = latency
+        self.file_count = file_count
+        self.file_size = file_size
+
+    def _files(self):
+        files = ["app.py", "requirements.txt", "README.md"]
+        files += [f"src/module_{index}.py" for index in range(max(self.file_count - len(files), 0))]
+        return files
+
+    def _content(self, path):
+        line = f"# {path}: generated load-test content\nvalue = {len(path)}\n"
+        return (line * (self.file_size // len(line) + 1))[:self.file_size]
+
+    def get(self, url, timeout=None, **kwargs):
+        time.sleep(self.latency)
+        if "/git/trees/" in url:
+            tree = [{"path": path, "type": "blob"} for path in self._files()]
+            return FakeResponse(payload={"tree": tree})
+        if url.startswith("https://api.github.com/repos/"):
+            return FakeResponse(payload={"default_branch": "main"})
+        if url.startswith("https://raw.githubusercontent.com/"):
+            path = url.split("/main/", 1)[-1]
+            return FakeResponse(text=self._content(path))
+        return FakeResponse(status_code=404)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FakeMessage:
+    def __init__(self, content, usage_metadata=None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+        self.response_metadata = {}
+
+
+class FakeLLM:
+    """
+    Stand-in for ChatBedrock that sleeps for latency seconds and echoes the
+    code it was asked to edit (or a small template for generations).
+    Streaming yields a first chunk after a fraction of the latency.
+    """
+
+    def __init__(self, latency=0.5):
+        self.latency = latency
+
+    def _reply(self, messages):
+        human = messages[-1][1]
+        if "CODE: " in human:
+            return human.rsplit("CODE: ", 1)[1] + "\n# edited\n"
+        return "import streamlit as st\n\nst.title('Generated')\n"
+
+    def invoke(self, messages, **kwargs):
+        time.sleep(self.latency)
+        return FakeMessage(self._reply(messages))
+
+    def stream(self, messages, **kwargs):
+        from context_builder import estimate_tokens
+
+        reply = self._reply(messages)
+        time.sleep(self.latency * 0.2)
+        yield FakeMessage(reply[:20])
+        time.sleep(self.latency * 0.8)
+        usage = {
+            "input_tokens": sum(estimate_tokens(content) for _, content in messages),
+            "output_tokens": estimate_tokens(reply),
+        }
+        yield FakeMessage(reply[20:], usage_metadata=usage)
+
+
+def install_stand_ins(github_latency, bedrock_latency, file_count, file_size, fast_latency_ratio=0.3,
+                      snapshot_path=None):
+    """
+    Route the app's GitHub and Bedrock calls to the local stand-ins. The
+    fast model tier answers in fast_latency_ratio of the large tier's time.
+
+    Catalog previews are served from the snapshot at snapshot_path when it's
+    given; otherwise any catalog snapshot next to the app is ignored so the
+    GitHub fetch path is what gets measured. The git mirror backend is always
+    disabled, even if TEMPLATE_LAB_GIT_MIRRORS is set, so nothing is fetched
+    from the real GitHub.
+    """
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import bedrock
+    import template_core
+    import template_factory
+    from catalog_snapshot import CatalogSnapshot
+    from model_router import FAST_MODEL_ID, ModelRouter
+
+    def fake_llm_factory(model_id):
+        return FakeLLM(bedrock_latency * (fast_latency_ratio if model_id == FAST_MODEL_ID else 1))
+
+    router = ModelRouter(llm_factory=fake_llm_factory)
+    template_core.create_session = lambda token=None: FakeGitHubSession(github_latency, file_count, file_size)
+    bedrock.get_router = lambda: router
+
+    snapshot = CatalogSnapshot(snapshot_path) if snapshot_path else None
+    template_factory.get_catalog_snapshot = lambda: snapshot
+    template_factory.get_git_mirror_backend = lambda: None
+
+
+def serve(args):
+    """
+    Run app.py in a Streamlit server with the stand-ins installed.
+    Blocks until the process is terminated.
+    """
+    from streamlit.web import bootstrap
+
+    os.chdir(APP_DIR)
+    install_stand_ins(args.github_latency, args.bedrock_latency, args.files, args.file_size, args.fast_latency_ratio,
+                      snapshot_path=args.snapshot)
+    flag_options = {
+        "server_port": args.port,
+        "server_address": "127.0.0.1",
+        "server_headless": True,
+        "server_fileWatcherType": "none",
+        "server_runOnSave": False,
+        "browser_gatherUsageStats": False,
+    }
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(APP_PATH, False, [], flag_options)
+
+
+# -----------------------------------------------------------------------------
+# Headless websocket session
+# -----------------------------------------------------------------------------
+class SessionError(Exception):
+    """Raised when a simulated session can't complete its flow."""
+
+
+class HeadlessSession:
+    """
+    Speaks the Streamlit websocket protocol like a browser tab: keeps the
+    widget values, sends rerun requests and tracks the rendered widgets so
+    they can be found by label.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.connection = None
+        self.widgets = {}        # label -> (element type, widget id, fragment id, element)
+        self.widget_values = {}  # widget id -> WidgetState
+        self.message_cache = {}  # hash -> ForwardMsg, for ref_hash messages
+        self.timings = []        # (step, seconds, bytes received)
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+
+        url = self.base_url.replace("http://", "ws://") + "/_stcore/stream"
+        self.connection = await websocket_connect(url, subprotocols=["streamlit"], max_message_size=256 * 1024 * 1024)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _index_delta(self, msg):
+        delta = msg.delta
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            raise SessionError(f"App raised {element.exception.type}: {element.exception.message}")
+        if kind in ("button", "download_button", "selectbox", "text_area", "text_input", "checkbox", "slider"):
+            widget = getattr(element, kind)
+            self.widgets[widget.label] = (kind, widget.id, delta.fragment_id, widget)
+
+    async def interact(self, step, widget_states=(), fragment_id=""):
+        """
+        Send one rerun request and wait for the script (and any st.rerun it
+        triggers) to finish. Records latency and bytes received for step.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        back_msg = BackMsg()
+        client_state = back_msg.rerun_script
+        client_state.query_string = ""
+        client_state.page_script_hash = ""
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+        # Like the browser, send every widget's current value plus this
+        # interaction's one-shot triggers.
+        states = dict(self.widget_values)
+        states.update((state.id, state) for state in widget_states)
+        for state in states.values():
+            client_state.widget_states.widgets.add().CopyFrom(state)
+
+        started = time.perf_counter()
+        received = 0
+        await self.connection.write_message(back_msg.SerializeToString(), binary=True)
+        while True:
+            payload = await asyncio.wait_for(self.connection.read_message(), self.timeout)
+            if payload is None:
+                raise SessionError(f"{step}: server closed the connection")
+            received += len(payload)
+            msg = ForwardMsg()
+            msg.ParseFromString(payload)
+            msg_type = msg.WhichOneof("type")
+            if msg_type == "ref_hash":
+                msg = self.message_cache[msg.ref_hash]
+                msg_type = msg.WhichOneof("type")
+            elif msg.metadata.cacheable:
+                self.message_cache[msg.hash] = msg
+
+            if msg_type == "new_session":
+                # A full run replaces the page; a fragment run only its own widgets.
+                if not msg.new_session.fragment_ids_this_run:
+                    self.widgets = {}
+            elif msg_type == "delta":
+                self._index_delta(msg)
+            elif msg_type == "script_finished":
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise SessionError(f"{step}: app failed to compile")
+                break
+        self.timings.append((step, time.perf_counter() - started, received))
+
+    def _find(self, label_prefix):
+        for label, widget in self.widgets.items():
+            if label.startswith(label_prefix):
+                return widget
+        raise SessionError(f"No widget labelled {label_prefix!r} (have: {sorted(self.widgets)})")
+
+    async def click(self, step, label_prefix):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        _, widget_id, fragment_id, _ = self._find(label_prefix)
+        await self.interact(step, [WidgetState(id=widget_id, trigger_value=True)], fragment_id)
+
+    async def select(self, step, label_prefix, option):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        _, widget_id, fragment_id, widget = self._find(label_prefix)
+        self.widget_values[widget_id] = WidgetState(id=widget_id, int_value=list(widget.options).index(option))
+        await self.interact(step, fragment_id=fragment_id)
+
+    def type_text(self, label_prefix, text):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        _, widget_id, _, _ = self._find(label_prefix)
+        self.widget_values[widget_id] = WidgetState(id=widget_id, string_value=text)
+
+    async def download(self, step, label_prefix):
+        from tornado.httpclient import AsyncHTTPClient
+
+        _, _, _, widget = self._find(label_prefix)
+        started = time.perf_counter()
+        response = await AsyncHTTPClient().fetch(self.base_url + widget.url, request_timeout=self.timeout)
+        self.timings.append((step, time.perf_counter() - started, len(response.body)))
+
+    async def run_flow(self, template_name):
+        await self.connect()
+        await self.interact("load")
+        await self.select("browse", "Choose how you want to proceed", "Browse Existing Templates")
+        await self.click("select", f"📥 Select {template_name}")
+        await self.click("confirm", "✅ Select Template")
+        await self.download("download", "📥 Download Template")
+        await self.click("edit", "✏️ Edit Template")
+        self.type_text("Enter your AI prompt", "Rename the variables to be more descriptive")
+        await self.click("ai_edit", "Submit AI Edit")
+        await self.click("back", "⬅️ Back to Template Details")
+
+
+# -----------------------------------------------------------------------------
+# Server process metrics
+# -----------------------------------------------------------------------------
+def process_rss(pid):
+    """Resident memory of pid in bytes (Linux /proc)."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def process_cpu_seconds(pid):
+    """User + system CPU time consumed by pid so far (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run_level(base_url, server_pid, session_count, template_names, timeout):
+    """
+    Run session_count concurrent sessions through the flow and summarise
+    latency, throughput, payload, CPU and memory for this level.
+    """
+    sessions = [HeadlessSession(base_url, timeout) for _ in range(session_count)]
+    rss_before = process_rss(server_pid)
+    cpu_before = process_cpu_seconds(server_pid)
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(session.run_flow(template_names[index % len(template_names)]) for index, session in enumerate(sessions)),
+        return_exceptions=True,
+    )
+    wall_time = time.perf_counter() - started
+
+    # Measure while every session is still connected.
+    cpu_used = process_cpu_seconds(server_pid) - cpu_before
+    rss_after = process_rss(server_pid)
+    for session in sessions:
+        session.close()
+
+    errors = [f"{type(outcome).__name__}: {outcome}" for outcome in outcomes if isinstance(outcome, Exception)]
+    timings = [timing for session in sessions for timing in session.timings if timing[0] != "download"]
+    latencies = [seconds for _, seconds, _ in timings]
+    per_step = {}
+    for step in FLOW_STEPS:
+        step_timings = [(s, b) for session in sessions for name, s, b in session.timings if name == step]
+        if step_timings:
+            per_step[step] = {
+                "p50": statistics.median(s for s, _ in step_timings),
+                "bytes": statistics.median(b for _, b in step_timings),
+            }
+
+    return {
+        "sessions": session_count,
+        "completed": session_count - len(errors),
+        "errors": errors,
+        "reruns": len(latencies),
+        "wall_time": wall_time,
+        "throughput": len(latencies) / wall_time if wall_time else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies, default=0.0),
+        "bytes_per_rerun": statistics.mean(b for _, _, b in timings) if timings else 0.0,
+        "cpu_per_rerun": cpu_used / len(latencies) if latencies else 0.0,
+        "memory_per_session": max(rss_after - rss_before, 0) / session_count,
+        "steps": per_step,
+    }
+
+
+def print_report(reports):
+    header = (f"{'sessions':>8} {'ok':>4} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+              f"{'p99 ms':>8} {'max ms':>8} {'KiB/run':>8} {'cpu ms':>7} {'MiB/sess':>9}")
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        print(
+            f"{report['sessions']:>8} {report['completed']:>4} {report['reruns']:>7} "
+            f"{report['throughput']:>8.1f} {report['p50'] * 1000:>8.0f} {report['p90'] * 1000:>8.0f} "
+            f"{report['p99'] * 1000:>8.0f} {report['max'] * 1000:>8.0f} {report['bytes_per_rerun'] / 1024:>8.1f} "
+            f"{report['cpu_per_rerun'] * 1000:>7.1f} {report['memory_per_session'] / (1024 * 1024):>9.2f}"
+        )
+    print()
+    print("Median latency (ms) / payload (KiB) per step:")
+    print(f"{'sessions':>8} " + " ".join(f"{step:>13}" for step in FLOW_STEPS))
+    for report in reports:
+        cells = []
+        for step in FLOW_STEPS:
+            step_stats = report["steps"].get(step)
+            cells.append(f"{step_stats['p50'] * 1000:>6.0f}/{step_stats['bytes'] / 1024:<6.1f}" if step_stats else f"{'-':>13}")
+        print(f"{report['sessions']:>8} " + " ".join(cells))
+    for report in reports:
+        for error in report["errors"][:3]:
+            print(f"[{report['sessions']} sessions] {error}", file=sys.stderr)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(base_url, process, timeout=60):
+    from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SessionError("Streamlit server exited during startup")
+        try:
+            await AsyncHTTPClient().fetch(base_url + "/_stcore/health", request_timeout=2)
+            return
+        except (HTTPClientError, OSError):
+            await asyncio.sleep(0.25)
+    raise SessionError("Timed out waiting for the Streamlit server")
+
+
+async def run_load_test(args):
+    from template_core import template_info
+
+    port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+        "--github-latency", str(args.github_latency), "--bedrock-latency", str(args.bedrock_latency),
+        "--files", str(args.files), "--file-size", str(args.file_size),
+        "--fast-latency-ratio", str(args.fast_latency_ratio),
+    ]
+    if args.snapshot:
+        command += ["--snapshot", args.snapshot]
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    process = subprocess.Popen(command, cwd=APP_DIR, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        await wait_for_server(base_url, process)
+        # Warm up imports and caches so they aren't counted against the first level.
+        warm_up = HeadlessSession(base_url, args.timeout)
+        await warm_up.run_flow(next(iter(template_info)))
+        warm_up.close()
+
+        reports = []
+        for session_count in args.session_counts:
+            print(f"Running {session_count} concurrent sessions...", file=sys.stderr, flush=True)
+            reports.append(await run_level(base_url, process.pid, session_count, list(template_info), args.timeout))
+            await asyncio.sleep(1)  # Let the server clean up disconnected sessions.
+        return reports
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        if log is not subprocess.DEVNULL:
+            log.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test app.py with many concurrent simulated sessions.")
+    parser.add_argument("--sessions", default="1,5,10,25", help="Comma-separated concurrent session counts to test.")
+    parser.add_argument("--github-latency", type=float, default=0.05, help="Seconds per stand-in GitHub request.")
+    parser.add_argument("--bedrock-latency", type=float, default=0.5, help="Seconds per stand-in Bedrock call.")
+    parser.add_argument("--fast-latency-ratio", type=float, default=0.3,
+                        help="Stand-in fast model tier latency as a fraction of --bedrock-latency.")
+    parser.add_argument("--files", type=int, default=8, help="Files per stand-in repository.")
+    parser.add_argument("--file-size", type=int, default=2000, help="Bytes per stand-in repository file.")
+    parser.add_argument("--snapshot", help="Serve catalog previews from this catalog snapshot "
+                                           "(default: no snapshot, every select goes through the GitHub stand-in).")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for a single rerun.")
+    parser.add_argument("--port", type=int, default=0, help="Server port (default: any free port).")
+    parser.add_argument("--server-log", help="Write the Streamlit server output to this file.")
+    parser.add_argument("--json", help="Also write the raw results to this JSON file.")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args)
+        return 0
+
+    if args.snapshot:
+        args.snapshot = os.path.abspath(args.snapshot)
+    args.session_counts = [int(value) for value in args.sessions.split(",") if value.strip()]
+    reports = asyncio.run(run_load_test(args))
+    fetch_path = f"catalog snapshot {args.snapshot}" if args.snapshot else "GitHub stand-in"
+    for report in reports:
+        report["fetch_path"] = fetch_path
+    print(f"Template fetch path: {fetch_path}")
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 1 if any(report["errors"] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
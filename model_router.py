@@ -0,0 +1,198 @@
+"""
+Model tiering and per-call telemetry for Bedrock.
+
+ModelRouter sends small edits and short prompts to a fast, cheap model and
+keeps the large model for big generations, based on configurable input-size
+thresholds per task type. Every call records input/output tokens,
+time-to-first-token and total latency so the thresholds can be tuned:
+
+    python model_router.py telemetry.jsonl
+"""
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+
+from context_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+LARGE_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+
+# Largest estimated input (in tokens) that a task may have and still be sent
+# to the fast tier. Generations scaffold whole projects, so by default they
+# always use the large model.
+DEFAULT_FAST_MAX_INPUT_TOKENS = {
+    "edit": 4000,
+    "generate": 0,
+}
+
+
+class TelemetryLog:
+    """
+    Collects one record per LLM call: kept in memory (the oldest record is
+    dropped once max_records is reached) and, if a path is given, appended to
+    a JSONL file. Writing the file never fails the call being recorded.
+    """
+
+    def __init__(self, path=None, max_records=1000):
+        self.path = path
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        logger.info(
+            f"LLM call task={entry['task']} tier={entry['tier']} ok={entry['ok']} "
+            f"in={entry['input_tokens']} out={entry['output_tokens']} "
+            f"ttft={entry['ttft']}s latency={entry['latency']}s"
+        )
+        with self._lock:
+            self.records.append(entry)
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry) + "\n")
+                except OSError as e:
+                    logger.warning(f"Could not write LLM telemetry to {self.path}: {e}")
+
+
+class ModelRouter:
+    """
+    Picks a model tier per call and invokes it with streaming so
+    time-to-first-token can be measured.
+
+    llm_factory(model_id) builds a chat model; by default it creates a
+    ChatBedrock client with the given AWS settings.
+    """
+
+    def __init__(self, fast_model_id=FAST_MODEL_ID, large_model_id=LARGE_MODEL_ID,
+                 fast_max_input_tokens=None, telemetry=None, llm_factory=None, **aws_config):
+        self.model_ids = {"fast": fast_model_id, "large": large_model_id}
+        self.fast_max_input_tokens = dict(DEFAULT_FAST_MAX_INPUT_TOKENS)
+        self.fast_max_input_tokens.update(fast_max_input_tokens or {})
+        self.telemetry = telemetry or TelemetryLog()
+        self._llm_factory = llm_factory or self._create_bedrock_llm
+        self._aws_config = aws_config
+        self._llms = {}
+        self._lock = threading.Lock()
+
+    def _create_bedrock_llm(self, model_id):
+        from template_core import create_llm
+
+        return create_llm(model_id=model_id, **self._aws_config)
+
+    def get_llm(self, tier):
+        with self._lock:
+            if tier not in self._llms:
+                self._llms[tier] = self._llm_factory(self.model_ids[tier])
+            return self._llms[tier]
+
+    def route(self, task, input_tokens):
+        """
+        Return "fast" or "large" for a task with the given input size.
+        """
+        if input_tokens <= self.fast_max_input_tokens.get(task, 0):
+            return "fast"
+        return "large"
+
+    def invoke(self, task, messages):
+        """
+        Run messages on the tier chosen for task and return the response text.
+        A telemetry record is written whether the call succeeds or not.
+        """
+        input_text = "".join(content for _, content in messages)
+        estimated_input = estimate_tokens(input_text)
+        tier = self.route(task, estimated_input)
+        entry = {
+            "timestamp": time.time(),
+            "task": task,
+            "tier": tier,
+            "model_id": self.model_ids[tier],
+            "input_tokens": estimated_input,
+            "output_tokens": 0,
+            "usage_estimated": True,
+            "ttft": None,
+            "latency": None,
+            "ok": False,
+        }
+
+        started = time.perf_counter()
+        try:
+            parts = []
+            input_tokens = output_tokens = 0
+            for chunk in self.get_llm(tier).stream(messages):
+                if entry["ttft"] is None and chunk.content:
+                    entry["ttft"] = round(time.perf_counter() - started, 4)
+                parts.append(chunk.content if isinstance(chunk.content, str) else "")
+                usage = getattr(chunk, "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+            content = "".join(parts)
+
+            if input_tokens or output_tokens:
+                entry.update(input_tokens=input_tokens, output_tokens=output_tokens, usage_estimated=False)
+            else:
+                entry["output_tokens"] = estimate_tokens(content)
+            entry["ok"] = True
+            return content
+        finally:
+            entry["latency"] = round(time.perf_counter() - started, 4)
+            self.telemetry.record(entry)
+
+
+def summarize_telemetry(records):
+    """
+    Group telemetry records by (task, tier) and return latency/token stats.
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault((record["task"], record["tier"]), []).append(record)
+
+    summary = []
+    for (task, tier), group in sorted(groups.items()):
+        ok = [r for r in group if r["ok"]]
+        latencies = sorted(r["latency"] for r in ok)
+        ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+        summary.append({
+            "task": task,
+            "tier": tier,
+            "calls": len(group),
+            "errors": len(group) - len(ok),
+            "latency_p50": statistics.median(latencies) if latencies else None,
+            "latency_p90": latencies[int(0.9 * (len(latencies) - 1))] if latencies else None,
+            "ttft_p50": statistics.median(ttfts) if ttfts else None,
+            "input_tokens_mean": statistics.mean(r["input_tokens"] for r in ok) if ok else None,
+            "output_tokens_mean": statistics.mean(r["output_tokens"] for r in ok) if ok else None,
+        })
+    return summary
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python model_router.py TELEMETRY.jsonl", file=sys.stderr)
+        return 2
+
+    with open(argv[0], encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    def fmt(value, digits=2):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    print(f"{'task':<10} {'tier':<6} {'calls':>6} {'errors':>6} {'p50 s':>7} {'p90 s':>7} {'ttft s':>7} {'in tok':>8} {'out tok':>8}")
+    for row in summarize_telemetry(records):
+        print(
+            f"{row['task']:<10} {row['tier']:<6} {row['calls']:>6} {row['errors']:>6} "
+            f"{fmt(row['latency_p50']):>7} {fmt(row['latency_p90']):>7} {fmt(row['ttft_p50']):>7} "
+            f"{fmt(row['input_tokens_mean'], 0):>8} {fmt(row['output_tokens_mean'], 0):>8}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import hashlib
+import os
+
+import streamlit as st
+from pygments import format as format_tokens
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name, get_lexer_for_filename, guess_lexer
+from pygments.styles import get_style_by_name
+from pygments.token import Text
+from pygments.util import ClassNotFound
+
+# Pygments style used for the pre-rendered code blocks (matches the dark app theme).
+HIGHLIGHT_STYLE = "monokai"
+
+# CSS class of the wrapping <div>; the style rules are scoped to it.
+HIGHLIGHT_CSS_CLASS = "highlight"
+
+# Files Pygments doesn't recognise by name but whose language we know.
+SPECIAL_FILENAMES = {
+    ".gitignore": "text",
+    ".env": "bash",
+    ".env.example": "bash",
+}
+
+
+def content_digest(content):
+    """
+    Return a stable hash of the file content, used as the cache key for highlighting.
+    """
+    return hashlib.sha256(content.encode("utf-8", errors="replace")).hexdigest()
+
+
+def detect_language(file_name, content=""):
+    """
+    Detect the Pygments lexer alias for a file.
+    The file extension is tried first; if it's unknown, or only says plain
+    text (e.g. generated_template.txt), we fall back to guessing from the
+    content, and finally to plain text.
+    """
+    base_name = os.path.basename(file_name or "")
+    if base_name in SPECIAL_FILENAMES:
+        return SPECIAL_FILENAMES[base_name]
+
+    try:
+        language = get_lexer_for_filename(base_name, content).aliases[0]
+        if language != "text":
+            return language
+    except ClassNotFound:
+        pass
+
+    if content:
+        try:
+            return guess_lexer(content).aliases[0]
+        except ClassNotFound:
+            pass
+    return "text"
+
+
+def _merge_plain_tokens(tokens, style_name=HIGHLIGHT_STYLE):
+    """
+    Map tokens that the style renders like plain text (names, punctuation,
+    whitespace in monokai) to Text, so they are emitted without a <span>.
+    """
+    style = get_style_by_name(style_name)
+    plain = style.style_for_token(Text)
+    for token_type, value in tokens:
+        yield (Text if style.style_for_token(token_type) == plain else token_type), value
+
+
+@st.cache_data(show_spinner=False, max_entries=1000)
+def _highlight_cached(digest, file_name, language, _content):
+    """
+    Detect the language, tokenize and render content to HTML once per
+    (content hash, file name, language). The content itself is excluded from
+    Streamlit's argument hashing since the digest already identifies it.
+    """
+    if language is None:
+        language = detect_language(file_name, _content)
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        lexer = get_lexer_by_name("text")
+    # Tokens only carry CSS classes; the rules are sent once by highlight_css().
+    formatter = HtmlFormatter(
+        style=HIGHLIGHT_STYLE,
+        cssclass=HIGHLIGHT_CSS_CLASS,
+        wrapcode=True,
+        # Let long lines scroll instead of stretching the dialog.
+        prestyles="overflow-x: auto; padding: 10px; border-radius: 5px;",
+    )
+    return format_tokens(_merge_plain_tokens(lexer.get_tokens(_content)), formatter)
+
+
+@st.cache_data(show_spinner=False)
+def highlight_css():
+    """
+    Return the CSS rules for the highlighted code blocks. Include it once per
+    page (app.load_css does) instead of inlining styles on every token.
+    Pygments also emits unscoped rules (e.g. for `pre`); those are dropped so
+    they don't restyle the rest of the app.
+    """
+    scope = f".{HIGHLIGHT_CSS_CLASS}"
+    rules = HtmlFormatter(style=HIGHLIGHT_STYLE).get_style_defs(scope).splitlines()
+    return "\n".join(rule for rule in rules if rule.startswith(scope))
+
+
+def highlight_code(content, file_name=None, language=None):
+    """
+    Return the highlighted HTML for content.
+    The language is detected from file_name/content unless given explicitly.
+    """
+    content = content or ""
+    return _highlight_cached(content_digest(content), file_name, language, content)
+
+
+def render_code(content, file_name=None, language=None):
+    """
+    Drop-in replacement for st.code that renders pre-highlighted HTML.
+    Unchanged files are served from the cache and never re-tokenized.
+    """
+    st.html(highlight_code(content, file_name=file_name, language=language))
@@ -0,0 +1,292 @@
+"""
+UI-independent core for Template Lab.
+
+Everything in here runs without a Streamlit session: repository fetching,
+LLM generation/editing and ZIP export take explicit configuration and report
+progress through optional callbacks. The Streamlit modules (template_factory,
+bedrock, app) and the headless batch CLI (batch.py) are thin layers on top.
+"""
+import io
+import logging
+import os
+import zipfile
+
+import requests
+
+from model_router import LARGE_MODEL_ID
+
+logger = logging.getLogger(__name__)
+
+# GitHub templates along with their corresponding URLs and images.
+template_info = {
+    "Simple Streamlit Authentication": {
+        "url": "https://github.com/SourceBox-LLC/simple-streamlit-authentication.git",
+        "image": "images/streamlit login template.PNG",
+        "details": "A streamlined authentication system for Streamlit apps that includes user registration, login, and session management using local storage for credentials.",
+        "stack": "Streamlit, Python"
+    },
+
+    "AWS Lambda Auth": {
+        "url": "https://github.com/SourceBox-LLC/streamlit-login-template.git",
+        "image": "images/streamlit login template.PNG",
+        "details": "Secure authentication framework for Streamlit applications using AWS Lambda for serverless credential verification and user management in the cloud.",
+        "stack": "Streamlit, AWS Lambda, Python"
+    },
+
+    "Chatbot": {
+        "url": "https://github.com/SourceBox-LLC/streamlit-basic-langchain-chatbot.git",
+        "image": "images/streamlit chatbot anthropic template.png",
+        "details": "Interactive conversational interface powered by Anthropic's Claude 3.5 Sonnet model, featuring message history, customizable prompts, and a responsive UI.",
+        "stack": "Streamlit, LangChain, Python"
+    },
+
+    "RAG Chatbot ()": {
+        "url": "https://github.com/SourceBox-LLC/streamlit-basic-RAG-langchain-chatbot.git",
+        "image": "images/streamlit rag chatbot template.png",
+        "details": "Retrieval-Augmented Generation chatbot that combines document search with AI responses, allowing users to query their own data with Claude 3.5 Sonnet.",
+        "stack": "LangChain, Anthropic, Streamlit, Python"
+    },
+
+    "Image Generator Multi-Modal": {
+        "url": "https://github.com/SourceBox-LLC/image-generator-multi-select-template.git",
+        "image": "images/image chatbot.png",
+        "details": "Versatile image generation interface featuring multiple AI models from Hugging Face, with customizable parameters and a gallery view for comparing outputs.",
+        "stack": "Hugging Face, Streamlit, Python"
+    },
+
+    "Ace Editor": {
+        "url": "https://github.com/SourceBox-LLC/streamlit-ace-editor.git",
+        "image": "images/ace_editor_img.PNG",
+        "details": "Advanced code editing environment with syntax highlighting, multiple themes, and keyboard shortcuts, perfect for creating in-app code editors or IDEs.",
+        "stack": "Streamlit, Ace Editor, Python"
+    }
+}
+
+# Timeout (seconds) for each GitHub request.
+REQUEST_TIMEOUT = 30
+
+# Personal access token for GitHub. Anonymous API calls are limited to 60 per
+# hour, which bulk fetches exhaust after about 30 repositories.
+GITHUB_TOKEN_ENV = "GITHUB_TOKEN"
+
+GENERATE_SYSTEM_PROMPT = "You are a code template generator. Your output should be only valid code. Do not include any other text or comments."
+
+EDIT_SYSTEM_PROMPT = """
+         You are a code template editor.
+         Your goal is to edit the CODE provided based on the user PROMPT Your output should be only valid code.
+         CONTEXT, if present, contains related files from the same template for reference only; do not output it.
+         Do not include any other text or comments."""
+
+
+class TemplateFetchError(Exception):
+    """Raised when a repository template can't be fetched."""
+
+
+class EmptyRepositoryError(TemplateFetchError):
+    """Raised when a repository has no files to use as a template."""
+
+
+def _notify(progress, message):
+    if progress is not None:
+        progress(message)
+
+
+# -----------------------------------------------------------------------------
+# Repository fetching
+# -----------------------------------------------------------------------------
+def parse_repo_url(url):
+    """
+    Return (owner, repo) for a GitHub repository URL (with or without '.git').
+    """
+    base_url = url[:-4] if url.endswith('.git') else url
+    parts = base_url.split('/')
+    if len(parts) < 5:
+        raise TemplateFetchError("Invalid repository URL format.")
+    return parts[3], parts[4]
+
+
+def choose_main_file(files):
+    """
+    Pick the main file of a template, preferring app.py or main.py, then the
+    first Python file, then the first file overall.
+    """
+    if "app.py" in files:
+        return "app.py"
+    if "main.py" in files:
+        return "main.py"
+    py_files = [f for f in files if f.endswith('.py')]
+    if py_files:
+        return sorted(py_files)[0]
+    return sorted(files)[0]
+
+
+def create_session(token=None):
+    """
+    Return a requests.Session for GitHub. Requests are authenticated with
+    token, or with $GITHUB_TOKEN when no token is given.
+    """
+    session = requests.Session()
+    token = token or os.environ.get(GITHUB_TOKEN_ENV)
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    return session
+
+
+def fetch_repo_template(url, progress=None, session=None, timeout=REQUEST_TIMEOUT, strict=False):
+    """
+    Fetch a GitHub repository as a template dict with the keys 'main_file',
+    'main_file_content', 'other_files' and 'branch'.
+
+    progress is an optional callable taking a status message. Failures raise
+    TemplateFetchError; individual non-main files that fail are kept with an
+    error message as their content, like the preview dialog always did,
+    unless strict is true, in which case they raise too.
+    Without a session, one is opened with create_session().
+    """
+    if session is None:
+        with create_session() as session:
+            return fetch_repo_template(url, progress=progress, session=session, timeout=timeout, strict=strict)
+
+    http = session
+    owner, repo = parse_repo_url(url)
+
+    # Get repository info to determine the default branch
+    repo_info_url = f"https://api.github.com/repos/{owner}/{repo}"
+    _notify(progress, f"Fetching repository info from: {repo_info_url}")
+    try:
+        repo_info_response = http.get(repo_info_url, timeout=timeout)
+        repo_info_response.raise_for_status()
+        branch = repo_info_response.json().get("default_branch", "main")  # Fallback to "main" if not found
+        _notify(progress, f"Default branch: {branch}")
+    except requests.exceptions.RequestException as e:
+        raise TemplateFetchError(f"Error fetching repository info: {e}") from e
+
+    # Build the GitHub API URL for the tree (recursive)
+    tree_api_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
+    _notify(progress, f"Fetching repository tree from: {tree_api_url}")
+    try:
+        tree_response = http.get(tree_api_url, timeout=timeout)
+        tree_response.raise_for_status()
+        tree_data = tree_response.json()
+    except requests.exceptions.RequestException as e:
+        raise TemplateFetchError(f"Error fetching repository tree: {e}") from e
+
+    # Get list of files (filtering items with type 'blob')
+    files = [item['path'] for item in tree_data.get('tree', []) if item.get("type") == "blob"]
+    if not files:
+        raise EmptyRepositoryError("No files found in the repository.")
+
+    main_file = choose_main_file(files)
+
+    # Fetch content for the main file
+    raw_main_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{main_file}"
+    _notify(progress, f"Fetching main file from: {raw_main_url}")
+    try:
+        main_file_response = http.get(raw_main_url, timeout=timeout)
+        main_file_response.raise_for_status()
+        main_file_content = main_file_response.text
+    except requests.exceptions.RequestException as e:
+        raise TemplateFetchError(f"Error fetching main file: {e}") from e
+
+    # Fetch content for the rest of the files (exclude the main file)
+    other_files = {}
+    for file in files:
+        if file == main_file:
+            continue
+        raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file}"
+        try:
+            response = http.get(raw_url, timeout=timeout)
+            response.raise_for_status()
+            other_files[file] = response.text
+        except requests.exceptions.RequestException as e:
+            if strict:
+                raise TemplateFetchError(f"Error fetching {file}: {e}") from e
+            other_files[file] = f"Error fetching file: {e}"
+
+    return {
+        "main_file": main_file,
+        "main_file_content": main_file_content,
+        "other_files": other_files,
+        "branch": branch,
+    }
+
+
+# -----------------------------------------------------------------------------
+# LLM generation and editing
+# -----------------------------------------------------------------------------
+def create_llm(aws_access_key_id=None, aws_secret_access_key=None, region_name=None,
+               model_id=LARGE_MODEL_ID, **model_kwargs):
+    """
+    Create a ChatBedrock client from explicit configuration.
+    Credentials left as None fall back to boto3's default credential chain.
+    """
+    from langchain_aws import ChatBedrock
+
+    return ChatBedrock(
+        model_id=model_id,
+        model_kwargs=dict(temperature=0, **model_kwargs),
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        region_name=region_name,
+    )
+
+
+def build_edit_message(prompt, code, context=""):
+    """
+    Build the human message for an edit request.
+    """
+    human_message = f"PROMPT: {prompt}\n"
+    if context:
+        human_message += f"CONTEXT:\n{context}\n"
+    human_message += f"CODE: {code}"
+    return human_message
+
+
+def run_generation(router, prompt):
+    """
+    Generate a template from prompt and return the text. Errors propagate.
+    router is a model_router.ModelRouter, which picks the model tier.
+    """
+    messages = [
+        ("system", GENERATE_SYSTEM_PROMPT),
+        ("human", prompt),
+    ]
+    content = router.invoke("generate", messages)
+    logger.info(f"Raw AI response: {content}")
+    return content
+
+
+def run_edit(router, prompt, code, context=""):
+    """
+    Edit code according to prompt and return the new code. Errors propagate.
+    router is a model_router.ModelRouter, which picks the model tier.
+    """
+    messages = [
+        ("system", EDIT_SYSTEM_PROMPT),
+        ("human", build_edit_message(prompt, code, context)),
+    ]
+    content = router.invoke("edit", messages)
+    logger.info(f"Raw AI response: {content}")
+    return content
+
+
+# -----------------------------------------------------------------------------
+# Export
+# -----------------------------------------------------------------------------
+def create_template_zip(template):
+    """
+    Given a template dict with keys 'main_file', 'main_file_content', and optionally 'other_files',
+    create an in-memory ZIP file containing all of the template files.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        # Write the main file.
+        main_file_name = template.get("main_file", "template.txt")
+        main_content = template.get("main_file_content", "")
+        zip_file.writestr(main_file_name, main_content)
+
+        # Write any other files.
+        for file_name, content in template.get("other_files", {}).items():
+            zip_file.writestr(file_name, content)
+    buffer.seek(0)  # Rewind the buffer to the beginning so it can be read.
+    return buffer
@@ -1,54 +1,27 @@
 import streamlit as st
-import requests
 from PIL import Image
 import io
 import os
+from catalog_snapshot import load_snapshot
+from git_mirror import mirror_backend_from_env
+from syntax_highlight import render_code
+from template_core import EmptyRepositoryError, TemplateFetchError, fetch_repo_template, template_info
 
-# GitHub templates along with their corresponding URLs and images.
-template_info = {
-    "Simple Streamlit Authentication": {
-        "url": "https://github.com/SourceBox-LLC/simple-streamlit-authentication.git",
-        "image": "images/streamlit login template.PNG",
-        "details": "A streamlined authentication system for Streamlit apps that includes user registration, login, and session management using local storage for credentials.",
-        "stack": "Streamlit, Python"
-    },
-
-    "AWS Lambda Auth": {
-        "url": "https://github.com/SourceBox-LLC/streamlit-login-template.git",
-        "image": "images/streamlit login template.PNG",
-        "details": "Secure authentication framework for Streamlit applications using AWS Lambda for serverless credential verification and user management in the cloud.",
-        "stack": "Streamlit, AWS Lambda, Python"
-    },
-
-    "Chatbot": {
-        "url": "https://github.com/SourceBox-LLC/streamlit-basic-langchain-chatbot.git",
-        "image": "images/streamlit chatbot anthropic template.png",
-        "details": "Interactive conversational interface powered by Anthropic's Claude 3.5 Sonnet model, featuring message history, customizable prompts, and a responsive UI.",
-        "stack": "Streamlit, LangChain, Python"
-    },
-
-    "RAG Chatbot ()": {
-        "url": "https://github.com/SourceBox-LLC/streamlit-basic-RAG-langchain-chatbot.git",
-        "image": "images/streamlit rag chatbot template.png",
-        "details": "Retrieval-Augmented Generation chatbot that combines document search with AI responses, allowing users to query their own data with Claude 3.5 Sonnet.",
-        "stack": "LangChain, Anthropic, Streamlit, Python"
-    },
-
-    "Image Generator Multi-Modal": {
-        "url": "https://github.com/SourceBox-LLC/image-generator-multi-select-template.git",
-        "image": "images/image chatbot.png",
-        "details": "Versatile image generation interface featuring multiple AI models from Hugging Face, with customizable parameters and a gallery view for comparing outputs.",
-        "stack": "Hugging Face, Streamlit, Python"
-    },
-
-    "Ace Editor": {
-        "url": "https://github.com/SourceBox-LLC/streamlit-ace-editor.git",
-        "image": "images/ace_editor_img.PNG",
-        "details": "Advanced code editing environment with syntax highlighting, multiple themes, and keyboard shortcuts, perfect for creating in-app code editors or IDEs.",
-        "stack": "Streamlit, Ace Editor, Python"
-    }
-}
+@st.cache_resource
+def get_catalog_snapshot():
+    """
+    Memory-map the prebuilt catalog snapshot once per server process.
+    Returns None when no snapshot has been built.
+    """
+    return load_snapshot()
 
+@st.cache_resource
+def get_git_mirror_backend():
+    """
+    Local bare-mirror fetch backend, enabled by setting TEMPLATE_LAB_GIT_MIRRORS
+    to a cache directory. Returns None to use the GitHub REST endpoints.
+    """
+    return mirror_backend_from_env()
 
 def convert_to_raw(url):
     """
@@ -72,12 +45,12 @@ def convert_to_raw(url):
 @st.dialog("Template Preview", width="large")
 def show_template_modal(main_file, main_file_content, other_files):
     st.markdown(f"## 📄 Main Template File: `{main_file}`")
-    st.code(main_file_content, language="python")
+    render_code(main_file_content, file_name=main_file)
     if other_files:
         st.markdown("## 📁 Other Files")
         for file_path, content in other_files.items():
             with st.expander(f"📝 {file_path}"):
-                st.code(content, language="python")
+                render_code(content, file_name=file_path)
                 
     # Button to select the template and store its data to session
     if st.button("✅ Select Template", type="primary"):
@@ -94,92 +67,35 @@ def show_template_modal(main_file, main_file_content, other_files):
 def open_repo_template_modal(url):
     """
     Process a repository URL (ending in .git) by:
+      - Using the prebuilt catalog snapshot if it has this repository, or the
+        local git mirror backend if it's enabled, otherwise:
       - Determining the default branch via the GitHub API.
       - Fetching the repository tree.
       - Selecting a main file (preferring app.py or main.py).
       - Fetching the content of the main file and all other files.
       - Calling the modal dialog to show these files.
     """
-    # Remove trailing '.git' if present and parse repository details
-    base_url = url[:-4] if url.endswith('.git') else url
-    parts = base_url.split('/')
-    if len(parts) < 5:
-        st.error("Invalid repository URL format.")
-        return
-
-    owner = parts[3]
-    repo = parts[4]
-
-    # Get repository info to determine the default branch
-    repo_info_url = f"https://api.github.com/repos/{owner}/{repo}"
-    st.write(f"Fetching repository info from: {repo_info_url}")
-    try:
-        repo_info_response = requests.get(repo_info_url)
-        repo_info_response.raise_for_status()
-        repo_info = repo_info_response.json()
-        branch = repo_info.get("default_branch", "main")  # Fallback to "main" if not found
-        st.write(f"Default branch: {branch}")
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching repository info: {e}")
-        return
-
-    # Build the GitHub API URL for the tree (recursive)
-    tree_api_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-    st.write(f"Fetching repository tree from: {tree_api_url}")
-    try:
-        tree_response = requests.get(tree_api_url)
-        tree_response.raise_for_status()
-        tree_data = tree_response.json()
-        
-        # Get list of files (filtering items with type 'blob')
-        files = [item['path'] for item in tree_data.get('tree', []) if item.get("type") == "blob"]
-        if not files:
-            st.warning("No files found in the repository.")
-            return
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching repository tree: {e}")
-        return
-
-    # Determine the main file:
-    main_file = None
-    if "app.py" in files:
-        main_file = "app.py"
-    elif "main.py" in files:
-        main_file = "main.py"
+    # Serve catalog templates from the prebuilt snapshot when there is one.
+    snapshot = get_catalog_snapshot()
+    snapshot_name = snapshot.name_for_url(url) if snapshot else None
+    if snapshot_name:
+        template = snapshot.get_template(snapshot_name)
     else:
-        # If none match, choose the first file that ends with .py, otherwise the first file overall.
-        py_files = [f for f in files if f.endswith('.py')]
-        if py_files:
-            main_file = sorted(py_files)[0]
-        else:
-            main_file = sorted(files)[0]
-
-    # Fetch content for the main file
-    raw_main_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{main_file}"
-    st.write(f"Fetching main file from: {raw_main_url}")
-    try:
-        main_file_response = requests.get(raw_main_url)
-        main_file_response.raise_for_status()
-        main_file_content = main_file_response.text
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching main file: {e}")
-        return
-
-    # Fetch content for the rest of the files (exclude the main file)
-    other_files = {}
-    for file in files:
-        if file == main_file:
-            continue
-        raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file}"
+        mirror_backend = get_git_mirror_backend()
         try:
-            response = requests.get(raw_url)
-            response.raise_for_status()
-            other_files[file] = response.text
-        except requests.exceptions.RequestException as e:
-            other_files[file] = f"Error fetching file: {e}"
+            if mirror_backend is not None:
+                template = mirror_backend.fetch_template(url, progress=st.write)
+            else:
+                template = fetch_repo_template(url, progress=st.write)
+        except EmptyRepositoryError as e:
+            st.warning(str(e))
+            return
+        except TemplateFetchError as e:
+            st.error(str(e))
+            return
 
     # Show the modal dialog with the template details
-    show_template_modal(main_file, main_file_content, other_files)
+    show_template_modal(template["main_file"], template["main_file_content"], template["other_files"])
 
 @st.dialog("Generated Template Preview", width="large")
 def open_generated_template_modal():
@@ -196,14 +112,14 @@ def open_generated_template_modal():
         
         # Display the main file.
         st.markdown(f"## 📄 Main Template File: `{main_file}`")
-        st.code(main_file_content, language="python")
+        render_code(main_file_content, file_name=main_file)
         
         # Display other files if any.
         if other_files:
             st.markdown("## 📁 Other Files")
             for file_path, content in other_files.items():
                 with st.expander(f"📝 {file_path}"):
-                    st.code(content, language="python")
+                    render_code(content, file_name=file_path)
         
         # Button to select the template.
         if st.button("✅ Select Template", type="primary"):
@@ -225,25 +141,29 @@ def open_generated_template_modal():
             st.success("✨ Generated template saved to session!")
             st.rerun()
 
+@st.cache_data(show_spinner=False)
+def _resized_image_bytes(image_path, width, height):
+    img = Image.open(image_path)
+    img = img.resize((width, height), Image.LANCZOS)
+
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format=img.format if img.format else 'PNG')
+    return img_byte_arr.getvalue()
+
 # Add this function to resize images to a standard size
 def resize_image_to_standard(image_path, width=300, height=200):
     """
-    Resize an image to a standard size using PIL
+    Resize an image to a standard size using PIL.
+    The resized bytes are cached, so catalog reruns don't re-decode images.
     """
     try:
-        img = Image.open(image_path)
-        img = img.resize((width, height), Image.LANCZOS)
-        
         # Create a BytesIO object to hold the image data
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format=img.format if img.format else 'PNG')
-        img_byte_arr.seek(0)
-        
-        return img_byte_arr
+        return io.BytesIO(_resized_image_bytes(image_path, width, height))
     except Exception as e:
         st.error(f"Error resizing image: {e}")
         return None
 
+@st.fragment
 def display_templates_component():
     """
     Component to display a grid of template cards.
@@ -252,7 +172,11 @@ def display_templates_component():
     - Image (if available)
     - A short description
     - Selection button
+    Runs as a fragment, so selecting a card only reruns the grid (and opens
+    the preview dialog) instead of the whole page.
     """
+    snapshot = get_catalog_snapshot()
+
     # Convert dict to list for easier processing in batches
     all_templates = list(template_info.items())
     
@@ -279,8 +203,12 @@ def display_templates_component():
                         </div>
                     """, unsafe_allow_html=True)
                     
-                    # Display the template image if available
-                    if "image" in info and info["image"]:
+                    # Display the template image if available, preferring the
+                    # pre-resized thumbnail from the catalog snapshot
+                    thumbnail = snapshot.get_thumbnail(template_name) if snapshot else None
+                    if thumbnail:
+                        st.image(thumbnail, caption=template_name, width=300)
+                    elif "image" in info and info["image"]:
                         # Resize the image to standard dimensions
                         image_path = info["image"]
                         if os.path.exists(image_path):
@@ -0,0 +1,98 @@
+"""
+Tests for the local bare-mirror backend, run against throwaway file-based
+repositories (no network needed).
+
+    python -m pytest tests
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from git_mirror import GitMirrorBackend
+from template_core import TemplateFetchError
+
+# Bigger than the backend's default 512k blob limit, so it's left out of the
+# initial clone and fetched lazily.
+LARGE_BLOB_SIZE = 600 * 1024
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True,
+        env={**os.environ, "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+             "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com"},
+    ).stdout.strip()
+
+
+def commit_files(repo_dir, files, message):
+    for path, content in files.items():
+        file_path = os.path.join(repo_dir, path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    git(repo_dir, "add", "-A")
+    git(repo_dir, "commit", "-q", "-m", message)
+
+
+def missing_objects(mirror_dir):
+    """
+    Return the ids of objects the partial clone hasn't downloaded yet.
+    """
+    env = {**os.environ, "GIT_NO_LAZY_FETCH": "1"}
+    output = subprocess.run(
+        ["git", "rev-list", "--objects", "--all", "--missing=print"],
+        cwd=mirror_dir, check=True, capture_output=True, text=True, env=env,
+    ).stdout
+    return {line[1:] for line in output.splitlines() if line.startswith("?")}
+
+
+class GitMirrorBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp_dir, "source")
+        os.makedirs(self.source)
+        git(self.source, "init", "-q", "-b", "main")
+        # Needed for the blob filter and for fetching filtered blobs on demand.
+        git(self.source, "config", "uploadpack.allowFilter", "true")
+        git(self.source, "config", "uploadpack.allowAnySHA1InWant", "true")
+        commit_files(self.source, {
+            "app.py": "import streamlit as st\n",
+            "src/helpers.py": "def helper():\n    return 1\n",
+            "data/large.txt": "x" * LARGE_BLOB_SIZE,
+        }, "initial")
+        self.backend = GitMirrorBackend(os.path.join(self.tmp_dir, "mirrors"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_first_clone_reads_large_blob_lazily(self):
+        mirror_dir, branch = self.backend.update(self.source)
+        self.assertEqual(branch, "main")
+        large_blob = git(self.source, "rev-parse", "HEAD:data/large.txt")
+        self.assertIn(large_blob, missing_objects(mirror_dir))
+
+        template = self.backend.fetch_template(self.source)
+        self.assertEqual(template["main_file"], "app.py")
+        self.assertEqual(template["main_file_content"], "import streamlit as st\n")
+        self.assertEqual(template["other_files"]["src/helpers.py"], "def helper():\n    return 1\n")
+        self.assertEqual(len(template["other_files"]["data/large.txt"]), LARGE_BLOB_SIZE)
+        self.assertNotIn(large_blob, missing_objects(mirror_dir))
+        self.assertEqual([name for name in os.listdir(self.backend.cache_dir) if ".tmp-" in name], [])
+
+    def test_refresh_picks_up_new_commit(self):
+        self.backend.fetch_template(self.source)
+        commit_files(self.source, {"app.py": "import streamlit as st\nst.title('v2')\n"}, "update")
+
+        template = self.backend.fetch_template(self.source, refresh=True)
+        self.assertEqual(template["main_file_content"], "import streamlit as st\nst.title('v2')\n")
+
+    def test_missing_repository_raises(self):
+        with self.assertRaises(TemplateFetchError):
+            self.backend.fetch_template(os.path.join(self.tmp_dir, "does-not-exist"))
+        self.assertEqual(os.listdir(self.backend.cache_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()